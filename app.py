@@ -1,14 +1,21 @@
 import streamlit as st
 import asyncio
-import nest_asyncio
-from main import TodoChatbot
+import logging
 from dotenv import load_dotenv
-import time
-from typing import Optional
+from pathlib import Path
+from typing import Optional, TYPE_CHECKING
 
-# Fix event loop issues
-nest_asyncio.apply()
+if TYPE_CHECKING:
+    from main import TodoChatbot
+
+# Use uvloop for the chatbot's event loops when it is available
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 load_dotenv()
+logging.basicConfig(level=logging.WARNING)
 
 # --- Streamlit UI Configuration ---
 st.set_page_config(
@@ -19,172 +26,73 @@ st.set_page_config(
 )
 
 # Custom Dark Theme CSS
-st.markdown("""
-    <style>
-    :root {
-        --primary: #7f5af0;
-        --secondary: #2cb67d;
-        --dark-bg: #16161a;
-        --card-bg: #242629;
-        --text-primary: #fffffe;
-        --text-secondary: #94a1b2;
-        --accent: #7f5af0;
-    }
-    
-    .stApp {
-        background-color: var(--dark-bg);
-        color: var(--text-primary);
-    }
-    
-    .stChatMessage {
-        padding: 16px 20px;
-        border-radius: 18px;
-        margin-bottom: 12px;
-        max-width: 85%;
-        animation: fadeIn 0.3s ease-out;
-        font-family: 'Segoe UI', system-ui, sans-serif;
-    }
-    
-    @keyframes fadeIn {
-        from { opacity: 0; transform: translateY(10px); }
-        to { opacity: 1; transform: translateY(0); }
-    }
-    
-    [data-testid="stChatMessage-user"] {
-        background-color: var(--card-bg);
-        margin-left: auto;
-        border: 1px solid #2e3033;
-        color: var(--text-primary);
-        border-bottom-right-radius: 4px;
-    }
-    
-    [data-testid="stChatMessage-assistant"] {
-        background: linear-gradient(135deg, var(--primary) 0%, #6c43e0 100%);
-        color: white;
-        border-bottom-left-radius: 4px;
-    }
-    
-    .stButton>button {
-        background: linear-gradient(135deg, var(--primary) 0%, #6c43e0 100%);
-        color: white;
-        border-radius: 12px;
-        padding: 8px 16px;
-        border: none;
-        font-weight: 500;
-        transition: all 0.2s;
-    }
-    
-    .stButton>button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(127, 90, 240, 0.4);
-    }
-    
-    .stTextInput>div>div>input {
-        border-radius: 12px;
-        padding: 12px 16px;
-        background-color: var(--card-bg);
-        color: var(--text-primary);
-        border: 1px solid #2e3033;
-    }
-    
-    .sidebar .sidebar-content {
-        background-color: var(--card-bg);
-        border-right: 1px solid #2e3033;
-    }
-    
-    .stSpinner>div {
-        background: linear-gradient(135deg, var(--primary) 0%, #6c43e0 100%);
-    }
-    
-    .chat-container {
-        height: calc(100vh - 200px);
-        overflow-y: auto;
-        padding: 0 16px;
-    }
-    
-    .typing-indicator {
-        display: inline-block;
-        padding: 12px 16px;
-        background: var(--card-bg);
-        border-radius: 18px;
-        color: var(--text-primary);
-        border: 1px solid #2e3033;
-    }
-    
-    .typing-dot {
-        display: inline-block;
-        width: 8px;
-        height: 8px;
-        border-radius: 50%;
-        background-color: var(--primary);
-        margin: 0 2px;
-        animation: typingAnimation 1.4s infinite ease-in-out;
-    }
-    
-    h1, h2, h3, h4, h5, h6 {
-        color: var(--text-primary) !important;
-    }
-    
-    .stMarkdown p {
-        color: var(--text-primary);
-    }
-    
-    .stTextInput>div>div>input::placeholder {
-        color: var(--text-secondary);
-    }
-    
-    hr {
-        border-color: #2e3033;
-    }
-    
-    /* Scrollbar styling */
-    ::-webkit-scrollbar {
-        width: 8px;
-    }
-    ::-webkit-scrollbar-track {
-        background: var(--card-bg);
-    }
-    ::-webkit-scrollbar-thumb {
-        background: var(--primary);
-        border-radius: 4px;
-    }
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_resource(show_spinner=False)
+def load_theme_css() -> str:
+    """Read the theme stylesheet once per process"""
+    css = (Path(__file__).parent / "static" / "theme.css").read_text(encoding="utf-8")
+    return f"<style>\n{css}</style>"
+
+st.markdown(load_theme_css(), unsafe_allow_html=True)
+
+# Number of most recent messages rendered directly in the chat
+RECENT_MESSAGES = 50
+
+AVATARS = {"assistant": "🤖", "user": "👤"}
 
 # --- Chatbot Initialization ---
-def initialize_chatbot() -> Optional[TodoChatbot]:
-    """Initialize chatbot with proper event loop handling"""
-    if "chatbot" not in st.session_state:
-        try:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-            st.session_state.chatbot = TodoChatbot(st.session_state.user_name.lower())
-            st.session_state.chatbot.memory.set_user_name(st.session_state.user_name)
-            
-            if "messages" not in st.session_state:
-                st.session_state.messages = [
-                    {"role": "assistant", "content": f"Hi {st.session_state.user_name}! I'm your AI Todo Assistant. How can I help you today? 🌟"}
-                ]
-            return st.session_state.chatbot
-        except Exception as e:
-            st.error(f"Failed to initialize chatbot: {str(e)}")
-            return None
-        finally:
-            loop.close()
-    return st.session_state.chatbot
+@st.cache_resource(show_spinner=False)
+def get_chatbot(user_id: str) -> "TodoChatbot":
+    """Build the chatbot once per user and share it across reruns"""
+    # Imported here so the landing page renders without loading LangChain
+    from main import TodoChatbot
+    chatbot = TodoChatbot(user_id)
+    # Warm up the LLM connection while the user types their first message
+    chatbot.prewarm()
+    return chatbot
+
+def initialize_chatbot() -> Optional["TodoChatbot"]:
+    """Fetch the cached chatbot and seed the chat for a new session"""
+    try:
+        chatbot = get_chatbot(st.session_state.user_name.lower())
+    except Exception as e:
+        st.error(f"Failed to initialize chatbot: {str(e)}")
+        return None
+    
+    if "messages" not in st.session_state:
+        chatbot.memory.set_user_name(st.session_state.user_name)
+        st.session_state.messages = [
+            {"role": "assistant", "content": f"Hi {st.session_state.user_name}! I'm your AI Todo Assistant. How can I help you today? 🌟"}
+        ]
+    return chatbot
+
+def render_message(message: dict):
+    """Render a single chat message"""
+    with st.chat_message(message["role"], avatar=AVATARS[message["role"]]):
+        st.markdown(message["content"])
 
 def show_typing_indicator():
-    """Display typing indicator animation"""
-    with st.empty():
-        st.markdown("""
-        <div class="typing-indicator">
-            <span class="typing-dot"></span>
-            <span class="typing-dot"></span>
-            <span class="typing-dot"></span>
-        </div>
-        """, unsafe_allow_html=True)
-        time.sleep(1.5)
+    """Display typing indicator animation and return its placeholder"""
+    placeholder = st.empty()
+    placeholder.markdown("""
+    <div class="typing-indicator">
+        <span class="typing-dot"></span>
+        <span class="typing-dot"></span>
+        <span class="typing-dot"></span>
+    </div>
+    """, unsafe_allow_html=True)
+    return placeholder
+
+def stream_reply(chatbot: "TodoChatbot", prompt: str):
+    """Stream the chatbot reply, showing the typing indicator until it starts"""
+    typing_indicator = show_typing_indicator()
+    chunks = chatbot.stream_chat(prompt)
+    try:
+        first = next(chunks, None)
+    finally:
+        typing_indicator.empty()
+    if first is not None:
+        yield first
+        yield from chunks
 
 # --- Main App ---
 def main():
@@ -231,26 +139,28 @@ def main():
     # Display chat history
     chat_container = st.container()
     with chat_container:
-        for message in st.session_state.messages:
-            avatar = "🤖" if message["role"] == "assistant" else "👤"
-            with st.chat_message(message["role"], avatar=avatar):
-                st.markdown(message["content"])
+        messages = st.session_state.messages
+        if len(messages) > RECENT_MESSAGES:
+            with st.expander(f"Show {len(messages) - RECENT_MESSAGES} earlier messages"):
+                for message in messages[:-RECENT_MESSAGES]:
+                    render_message(message)
+        for message in messages[-RECENT_MESSAGES:]:
+            render_message(message)
     
     # Chat input
     if prompt := st.chat_input(f"Message {st.session_state.user_name}'s assistant..."):
-        # Add user message
-        st.session_state.messages.append({"role": "user", "content": prompt})
+        # Show the user message right away
+        user_message = {"role": "user", "content": prompt}
+        with chat_container:
+            render_message(user_message)
         
-        # Get AI response
-        with st.spinner(""):
-            show_typing_indicator()
-            response = chatbot.chat(prompt)
+        # Stream the AI response into a new assistant message
+        with chat_container:
+            with st.chat_message("assistant", avatar=AVATARS["assistant"]):
+                response = st.write_stream(stream_reply(chatbot, prompt))
         
-        # Add assistant response
-        st.session_state.messages.append({"role": "assistant", "content": response})
-        
-        # Rerun to update UI
-        st.rerun()
+        # Store both messages in one write
+        st.session_state.messages.extend([user_message, {"role": "assistant", "content": response}])
     
     # Sidebar controls
     with st.sidebar:
@@ -263,13 +173,24 @@ def main():
         col1, col2 = st.columns(2)
         with col1:
             if st.button("📝 Show Todos", use_container_width=True):
-                response = chatbot.chat("Show my todos")
-                st.session_state.messages.append({"role": "assistant", "content": response})
-                st.rerun()
+                assistant_message = {"role": "assistant", "content": chatbot.chat("Show my todos")}
+                st.session_state.messages.append(assistant_message)
+                with chat_container:
+                    render_message(assistant_message)
         with col2:
             if st.button("➕ Add Todo", use_container_width=True):
-                st.session_state.messages.append({"role": "user", "content": "Add a new task"})
-                st.rerun()
+                # Ask for the task text directly; no LLM call or rerun needed
+                new_messages = [
+                    {"role": "user", "content": "Add a new task"},
+                    {"role": "assistant", "content": "Sure! What task would you like to add?"}
+                ]
+                st.session_state.messages.extend(new_messages)
+                # Store the exchange too, so the agent knows the next message is the task to add
+                for message in new_messages:
+                    chatbot.memory.add_to_conversation(message["role"], message["content"])
+                with chat_container:
+                    for message in new_messages:
+                        render_message(message)
         
         st.markdown("---")
         
@@ -282,8 +203,9 @@ def main():
             st.rerun()
         
         if st.button("🔄 Restart", use_container_width=True):
-            for key in list(st.session_state.keys()):
-                del st.session_state[key]
+            # The cached chatbot outlives the session; only reset per-session state
+            for key in ("user_name", "messages"):
+                st.session_state.pop(key, None)
             st.rerun()
         
         st.markdown("---")
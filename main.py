@@ -1,29 +1,176 @@
 import os
 import re
+import asyncio
 import random
-import json
+import time
+import threading
+import logging
+import numpy as np
 from pathlib import Path
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, List, Dict, Iterator, Optional, Tuple
 from dotenv import load_dotenv
-from langchain.agents import AgentExecutor, create_react_agent
-from langchain.prompts import PromptTemplate
+from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain_core.tools import Tool
-from langchain_google_genai import ChatGoogleGenerativeAI
+from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
 from memory_manager import MemoryManager
 from tools import TodoTools
 
 # Load environment variables
 load_dotenv()
+_GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
+
+logger = logging.getLogger(__name__)
+
+# Simple inputs that can be answered without a round-trip to the LLM
+_GREETING_RE = re.compile(r"^(?:hi|hello|hey|greetings?|good\s+(?:morning|afternoon|evening)|what'?s\s+up|how'?s\s+it\s+going)\s*[!.?]?$", re.I)
+_EXIT_WORDS = frozenset({'exit', 'quit', 'bye', 'goodbye'})
+# Short replies answered from the response templates
+_CANNED_KINDS = {
+    'ok': 'affirmative', 'k': 'affirmative', 'okay': 'affirmative', 'yes': 'affirmative',
+    'yeah': 'affirmative', 'sure': 'affirmative',
+    'thanks': 'thanks', 'thank you': 'thanks', 'thx': 'thanks',
+    'no': 'nothing_response', 'nope': 'nothing_response', 'nothing': 'nothing_response'
+}
+# Kinds that answer a question, so the LLM handles them when the assistant just asked one
+_REPLY_KINDS = frozenset({'affirmative', 'nothing_response'})
+# Both patterns are anchored on the todo words themselves so questions that merely mention tasks go to the LLM
+_LIST_RE = re.compile(r"^(?:(?:list|show|display)(?:\s+me)?(?:\s+all)?(?:\s+(?:of\s+)?(?:my|the))?|what'?s\s+(?:on\s+)?(?:my|the))"
+                      r"\s+(?:todos?|to-dos?|tasks?|(?:todo\s+|to-do\s+)?list)\s*[.!?]?$|^list$", re.I)
+_ADD_RE = re.compile(r"""
+    ^(?:add|create|new(?=\s+(?:task|todo)))\s+
+    (?:
+        (?:task|todo|to-do):?\s+                                                  # add task: call mom
+      | (?=.+\s+to\s+(?:my\s+)?(?:todo\s+|to-do\s+)?(?:list|todos?)\s*[.!?]?$)  # add a call to my list
+      | (?!.*\b(?:a|an|the|my|your|our|this|that|it|more|some|any)\b)            # add call mom, not "add more detail"
+    )
+    (.+?)(?:\s+to\s+(?:my\s+)?(?:todo\s+|to-do\s+)?(?:list|todos?))?\s*[.!?]?$
+""", re.I | re.X)
+_REMOVE_RE = re.compile(r'^(?:remove|delete|drop)\s+(?:task\s+)?(.+?)(?:\s+from\s+(?:my\s+)?(?:todo\s+|to-do\s+)?(?:list|todos?))?\s*[.!?]?$', re.I)
+_COMPLETE_RE = re.compile(r'^(?:complete|finish|done\s+with|mark)\s+(?:task\s+)?(.+?)(?:\s+as\s+(?:done|complete|completed|finished))?\s*[.!?]?$', re.I)
+_CLEAR_RE = re.compile(r'^(?:clear|empty|reset)\s+(?:out\s+)?(?:all\s+)?(?:of\s+)?(?:my\s+|the\s+)?(?:todo\s+|to-do\s+)?(?:list|todos?|to-dos?|tasks?)\s*[.!?]?$', re.I)
+# Every fast-path pattern starts with one of these words; anything else skips the regexes
+_FAST_PATH_STARTS = ('hi', 'hello', 'hey', 'greet', 'good', 'what', 'how', 'list', 'show', 'display',
+                     'add', 'create', 'new', 'remove', 'delete', 'drop', 'complete', 'finish', 'done', 'mark',
+                     'clear', 'empty', 'reset')
+
+# Inputs that may change the todo list are never answered from the response cache;
+# they are resolved with a single tool-calling request instead of the agent loop
+_MUTATING_RE = re.compile(r'\b(?:add|create|remove|delete|drop|complete|done|finish|mark|clear)\b', re.I)
+_RESPONSE_CACHE_TTL = 300
+# Questions that refer back to earlier turns; their answers depend on the conversation, so they are never cached
+_FOLLOW_UP_RE = re.compile(r"\b(?:it|its|that|this|those|these|them|they|why|more|again|else|above|previous|last)\b", re.I)
+# AgentExecutor's reply when it gives up; never worth caching
+_AGENT_STOPPED = "Agent stopped due to"
+
+# Let Gemini decide when to call tools; in AUTO mode one reply may hold several calls
+_TOOL_CONFIG = {"function_calling_config": {"mode": "AUTO"}}
+_RESPONSE_CACHE_SIZE = 256
+
+# Read-only questions this close to a cached one (cosine similarity of their
+# embeddings) reuse its answer, e.g. "what's on my list?" and "show me my tasks"
+_EMBEDDING_MODEL = "models/text-embedding-004"
+_SIMILARITY_THRESHOLD = 0.92
+
+# Agent limits: stop without an extra LLM call once either bound is hit,
+# and cap how many tool calls from one step run at the same time
+_AGENT_MAX_ITERATIONS = 3
+_AGENT_MAX_SECONDS = 8.0
+_AGENT_CONFIG = {"max_concurrency": 4}
+
+# Replies are short confirmations and answers; a low cap keeps generation time down
+_MAX_OUTPUT_TOKENS = 200
+
+# Name, TodoChatbot handler and description of each tool offered to the LLM
+_TOOL_SPECS = [
+    ("add_todo", "_safe_add_todo", "Add a task; input is its description."),
+    ("list_todos", "_safe_list_todos", "List the current tasks."),
+    ("remove_todo", "_safe_remove_todo", "Remove a task by number or partial description."),
+    ("complete_todo", "_safe_complete_todo", "Mark a task done by number or partial description."),
+    ("clear_todos", "_safe_clear_todos", "Remove all active tasks.")
+]
+
+# Tool-calling prompt, parsed once and shared by every chatbot instance. The system
+# message never changes, so per-turn context goes in the final human message instead
+_SYSTEM_PROMPT = """You are a helpful personal assistant that manages to-do lists and holds conversations.
+
+Guidelines:
+- Always be friendly and conversational
+- Remember and use the user's name when known
+- Keep responses natural and helpful
+- For task management, use the appropriate tools
+- When listing todos, present them in a clear, numbered format
+- Acknowledge successful actions clearly
+- If a user greets you, respond warmly and ask how you can help"""
+
+_AGENT_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", _SYSTEM_PROMPT),
+    MessagesPlaceholder("chat_history", optional=True),
+    ("human", "Context:\n{context}\n\n{input}"),
+    MessagesPlaceholder("agent_scratchpad")
+])
+
+# Roles in the conversation history mapped to chat message types
+_HISTORY_ROLES = {"user": "human", "assistant": "ai"}
+
+# Prompt budget for past turns: at most _HISTORY_TURNS exchanges (the latest one plus
+# earlier ones sharing a word with the input), each message cut to _HISTORY_CHARS, and
+# older requests condensed into a summary rebuilt every _SUMMARY_EVERY agent turns
+_HISTORY_TURNS = 2
+_HISTORY_SCAN = 4
+_HISTORY_CHARS = 200
+_SUMMARY_EVERY = 10
+_SUMMARY_ITEMS = 5
+_SUMMARY_ITEM_CHARS = 60
+# Stored messages the chat history is picked from: _HISTORY_SCAN exchanges plus the input being answered.
+# The summary covers only messages older than this window
+_HISTORY_WINDOW = _HISTORY_SCAN * 2 + 1
+_WORD_RE = re.compile(r"[a-z0-9']+")
+_STOPWORDS = frozenset({
+    'a', 'an', 'the', 'and', 'or', 'but', 'to', 'of', 'in', 'on', 'at', 'for', 'with', 'is', 'are',
+    'was', 'be', 'it', 'this', 'that', 'i', 'me', 'my', 'you', 'your', 'we', 'do', 'can', 'what',
+    'how', 'please', 'list', 'task', 'tasks', 'todo', 'todos'
+})
 
 class TodoChatbot:
-    def __init__(self, user_id: str = "default"):
+    def __init__(self, user_id: str = "default", google_api_key: Optional[str] = None):
         """Initialize the chatbot with memory and tools"""
         self.user_id = user_id
         self.memory = MemoryManager(user_id)
         self.todo_tools = TodoTools(self.memory)
-        self.llm = self._initialize_llm()
+        self.llm = self._initialize_llm(google_api_key or _GOOGLE_API_KEY)
+        self.embeddings = GoogleGenerativeAIEmbeddings(model=_EMBEDDING_MODEL, google_api_key=google_api_key or _GOOGLE_API_KEY)
+        self.tools = self._build_tools()
+        self._tools_by_name = {t.name: t for t in self.tools}
+        self._llm_tools = self.llm.bind_tools(self.tools, tool_config=_TOOL_CONFIG)
         self.agent_executor = self._setup_agent()
         self._initialize_responses()
+        self._fast_paths = [
+            (_GREETING_RE, lambda m: self._respond('greetings')),
+            (_LIST_RE, lambda m: self._safe_list_todos()),
+            (_ADD_RE, lambda m: self._safe_add_todo(m.group(1))),
+            (_REMOVE_RE, lambda m: self._safe_remove_todo(m.group(1))),
+            (_COMPLETE_RE, lambda m: self._safe_complete_todo(m.group(1))),
+            (_CLEAR_RE, lambda m: self._safe_clear_todos())
+        ]
+        # Streamlit sessions share one chatbot per user, so these caches are used from several threads
+        self._summary_lock = threading.Lock()
+        self._loops = threading.local()  # one event loop per thread that calls stream_chat
+        self._summary = ""
+        self._summary_age = _SUMMARY_EVERY
+        self._cache_lock = threading.Lock()
+        self._response_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._cache_generation = 0
+        self._cache_hits = 0
+        self._cache_misses = 0
+        # Normalized query embeddings of cached responses, one row per key in _similar_keys
+        self._similar_keys: List[tuple] = []
+        self._similar_vectors = np.empty((0, 0))
+        self._query_vectors: Dict[tuple, np.ndarray] = {}  # embedded queries awaiting a reply
+        self._similar_hits = 0
+        self.todo_tools.add_change_listener(self._invalidate_responses)
         
     def _initialize_responses(self):
         """Initialize response templates"""
@@ -53,119 +200,132 @@ class TodoChatbot:
                 "Great {name}! What would you like to do?",
                 "Awesome {name}! How can I help?",
                 "Perfect {name}! What's next?"
+            ],
+            'thanks': [
+                "You're welcome, {name}!",
+                "Happy to help, {name}!",
+                "Anytime, {name}! Let me know if you need anything else."
             ]
         }
+        # (name, templates filled in with that name), replaced as a whole so other threads see one or the other
+        self._user_responses: Tuple[Optional[str], Dict[str, Tuple[str, ...]]] = (None, {})
         
-    def _initialize_llm(self) -> ChatGoogleGenerativeAI:
+    def _respond(self, kind: str) -> str:
+        """Pick a canned response of the given kind for the current user"""
+        name = self.memory.get_user_name() or "friend"
+        # Fill in the name once per name change rather than on every reply
+        responses_name, responses = self._user_responses
+        if name != responses_name:
+            responses = {
+                k: tuple(template.replace("{name}", name) for template in templates)
+                for k, templates in self.responses.items()
+            }
+            self._user_responses = (name, responses)
+        return random.choice(responses[kind])
+    
+    def _initialize_llm(self, google_api_key: Optional[str]) -> ChatGoogleGenerativeAI:
         """Initialize Google Gemini LLM"""
-        google_api_key = os.getenv("GOOGLE_API_KEY")
         if not google_api_key:
             raise ValueError("GOOGLE_API_KEY is required in .env file")
         
         return ChatGoogleGenerativeAI(
             model="gemini-1.5-flash",
             google_api_key=google_api_key,
-            temperature=0.3
+            temperature=0.3,
+            max_output_tokens=_MAX_OUTPUT_TOKENS,
+            streaming=True
         )
     
-    def _setup_agent(self) -> AgentExecutor:
-        """Setup the agent with tools"""
-        tools = [
-            Tool(
-                name="add_todo",
-                func=self._safe_add_todo,
-                description="Add a new task to the to-do list. Input should be the task description as a string."
-            ),
-            Tool(
-                name="list_todos", 
-                func=self._safe_list_todos,
-                description="List all current tasks in the to-do list. No input required."
-            ),
-            Tool(
-                name="remove_todo",
-                func=self._safe_remove_todo,
-                description="Remove a task from the to-do list. Input can be task number (1, 2, 3...) or partial task description."
-            ),
-            Tool(
-                name="complete_todo",
-                func=self._safe_complete_todo,
-                description="Mark a task as completed. Input can be task number (1, 2, 3...) or partial task description."
-            ),
+    def prewarm(self) -> threading.Thread:
+        """Open the Gemini connection in the background so the first real request skips the setup"""
+        def run():
+            try:
+                # Token counting goes through the same client but is not billed as a generation
+                self.llm.get_num_tokens("ping")
+            except Exception:
+                logger.debug("LLM prewarm failed", exc_info=True)
+        thread = threading.Thread(target=run, name="llm-prewarm", daemon=True)
+        thread.start()
+        return thread
+    
+    def _build_tools(self) -> List[Tool]:
+        """Build the todo tools exposed to the LLM"""
+        return [
             Tool(
-                name="clear_todos",
-                func=self._safe_clear_todos,
-                description="Clear all active tasks from the to-do list. No input required."
+                name=name,
+                func=getattr(self, handler),
+                coroutine=self._as_coroutine(getattr(self, handler)),
+                description=description
             )
+            for name, handler, description in _TOOL_SPECS
         ]
-        
-        prompt = PromptTemplate.from_template("""
-You are a helpful personal assistant that manages to-do lists and holds conversations.
-
-Current Context:
-{context}
-
-Available Tools:
-{tools}
-
-Tool Names: {tool_names}
-
-Guidelines:
-- Always be friendly and conversational
-- Remember and use the user's name when known
-- Keep responses natural and helpful
-- For task management, use the appropriate tools
-- When listing todos, present them in a clear, numbered format
-- Acknowledge successful actions clearly
-- If a user greets you, respond warmly and ask how you can help
-
-Use this format:
-
-Question: the user's input
-Thought: I need to understand what the user wants and decide if I need to use any tools
-Action: [tool name if needed]
-Action Input: [input for the tool if using one]
-Observation: [result from tool if used]
-... (repeat Thought/Action/Action Input/Observation as needed)
-Thought: I now know how to respond to the user
-Final Answer: [your conversational response to the user]
-
-Question: {input}
-Thought: {agent_scratchpad}""")
-        
-        agent = create_react_agent(
+    
+    def _as_coroutine(self, func: Callable[..., str]) -> Callable[..., Awaitable[str]]:
+        """Run a todo handler off the event loop; TodoTools serializes edits to the todos file"""
+        async def run(*args, **kwargs) -> str:
+            return await asyncio.to_thread(func, *args, **kwargs)
+        return run
+    
+    def _setup_agent(self) -> AgentExecutor:
+        """Setup the agent with tools"""
+        agent = create_tool_calling_agent(
             llm=self.llm,
-            tools=tools,
-            prompt=prompt
+            tools=self.tools,
+            prompt=_AGENT_PROMPT
         )
         
         return AgentExecutor(
             agent=agent,
-            tools=tools,
+            tools=self.tools,
             verbose=False,
-            handle_parsing_errors=True,
-            max_iterations=3
+            max_iterations=_AGENT_MAX_ITERATIONS,
+            max_execution_time=_AGENT_MAX_SECONDS,
+            early_stopping_method="force"
         )
     
     def _get_conversation_context(self) -> str:
         """Get context for the agent"""
         context = []
-        
-        # Add user name if available
         if name := self.memory.get_user_name():
             context.append(f"User's name: {name}")
+        if summary := self._get_summary():
+            context.append(f"Earlier requests: {summary}")
+        return "\n".join(context) if context else "No previous context available"
+    
+    def _get_summary(self) -> str:
+        """Condense user requests older than the chat history window, rebuilding it every few turns"""
+        with self._summary_lock:
+            if self._summary_age >= _SUMMARY_EVERY:
+                history = self.memory.get_conversation_history()
+                older = [msg.get("message", "")[:_SUMMARY_ITEM_CHARS] for msg in history[:-_HISTORY_WINDOW] if msg.get("role") == "user"]
+                self._summary = "; ".join(older[-_SUMMARY_ITEMS:])
+                self._summary_age = 0
+            self._summary_age += 1
+            return self._summary
+    
+    def _get_chat_history(self, user_input: str, stored: bool = True) -> List[Tuple[str, str]]:
+        """Get the last exchange, plus earlier ones relevant to the input, as chat messages"""
+        recent_history = self.memory.get_recent_conversation(limit=_HISTORY_WINDOW - (not stored), max_chars=_HISTORY_CHARS)
+        if stored:
+            # The last entry is the user message currently being answered
+            recent_history = recent_history[:-1]
+        turns: List[List[Tuple[str, str]]] = []
+        for role, message in recent_history:
+            if role not in _HISTORY_ROLES:
+                continue
+            if role == "user" or not turns:
+                turns.append([])
+            turns[-1].append((_HISTORY_ROLES[role], message))
         
-        # Add recent conversation history
-        recent_history = self.memory.get_conversation_history(limit=5)
-        if recent_history:
-            conv_text = []
-            for msg in recent_history[-3:]:  # Last 3 messages
-                role = msg.get('role', 'unknown')
-                message = msg.get('message', '')
-                conv_text.append(f"{role}: {message}")
-            if conv_text:
-                context.append(f"Recent conversation:\n" + "\n".join(conv_text))
-        
-        return "\n\n".join(context) if context else "No previous context available"
+        # Always keep the latest exchange so follow-ups like "yes, do that" make sense
+        kept = turns[-1:]
+        words = set(_WORD_RE.findall(user_input.lower())) - _STOPWORDS
+        for turn in reversed(turns[:-1]):
+            if len(kept) >= _HISTORY_TURNS:
+                break
+            if words & set(_WORD_RE.findall(" ".join(message for _, message in turn).lower())):
+                kept.insert(0, turn)
+        return [message for turn in kept for message in turn]
     
     def _safe_add_todo(self, task: str) -> str:
         """Safely add a todo"""
@@ -208,48 +368,387 @@ Thought: {agent_scratchpad}""")
         except Exception as e:
             return f"Error clearing tasks: {str(e)}"
     
+    def _match_fast_path(self, user_input: str) -> Optional[Tuple[Callable[[re.Match], str], re.Match]]:
+        """Find the fast-path handler for a plain command"""
+        if not user_input.lower().startswith(_FAST_PATH_STARTS):
+            return None
+        for pattern, handler in self._fast_paths:
+            if match := pattern.match(user_input):
+                return handler, match
+        return None
+    
+    def _awaiting_answer(self) -> bool:
+        """Whether the last assistant message asked the user something"""
+        # The user's reply is already stored, so look at the message before it
+        for msg in reversed(self.memory.get_conversation_history(limit=2)):
+            if msg.get("role") == "assistant":
+                return msg.get("message", "").rstrip().endswith("?")
+        return False
+    
+    def _try_fast_path(self, user_input: str) -> Optional[str]:
+        """Run a todo tool directly when the input is a plain command"""
+        input_lower = user_input.lower()
+        if input_lower in _EXIT_WORDS:
+            return self._respond('goodbye')
+        if (kind := _CANNED_KINDS.get(input_lower.rstrip('!.'))) and not (kind in _REPLY_KINDS and self._awaiting_answer()):
+            return self._respond(kind)
+        if found := self._match_fast_path(user_input):
+            handler, match = found
+            return handler(match)
+        return None
+    
+    def _response_cache_key(self, user_input: str) -> tuple:
+        """Key a response on the normalized input, the user's name and the todo generation"""
+        return user_input.lower(), self.memory.get_user_name(), self._cache_generation
+    
+    def _invalidate_responses(self):
+        """Drop cached responses once the todo list changes"""
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._response_cache.clear()
+            self._similar_keys = []
+            self._similar_vectors = np.empty((0, 0))
+            self._query_vectors.clear()
+    
+    def _get_cached_response(self, key: tuple) -> Optional[str]:
+        """Return a cached agent response that is still fresh"""
+        with self._cache_lock:
+            cached = self._response_cache.get(key)
+            if cached and time.monotonic() - cached[0] < _RESPONSE_CACHE_TTL:
+                self._response_cache.move_to_end(key)
+                self._cache_hits += 1
+                return cached[1]
+            self._cache_misses += 1
+            return None
+    
+    def _store_response(self, key: tuple, output: str):
+        """Cache an agent response, evicting the least recently used entry when full"""
+        with self._cache_lock:
+            self._response_cache[key] = (time.monotonic(), output)
+            self._response_cache.move_to_end(key)
+            if len(self._response_cache) > _RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+    
+    def _embed_query(self, user_input: str) -> Optional[np.ndarray]:
+        """Embed a question as a unit vector, or None when embeddings are unavailable"""
+        if self.embeddings is None:
+            return None
+        try:
+            vector = np.asarray(self.embeddings.embed_query(user_input), dtype=np.float32)
+        except Exception:
+            # Don't make every later question wait on a failing embedding service
+            logger.warning("Query embedding failed; similar-question cache disabled", exc_info=True)
+            self.embeddings = None
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+    
+    def _find_similar_response(self, user_input: str, cache_key: tuple) -> Optional[str]:
+        """Return the cached answer to a question phrased like this one"""
+        # Only answers given to the same user for the same todo list can be reused;
+        # without any, skip the embedding call and let _index_similar embed the question later
+        with self._cache_lock:
+            if not any(key[1:] == cache_key[1:] for key in self._similar_keys):
+                return None
+        # Embed outside the lock; it is a network call
+        if (vector := self._embed_query(user_input)) is None:
+            return None
+        with self._cache_lock:
+            if self._similar_keys:
+                similarity = self._similar_vectors @ vector
+                best = int(similarity.argmax())
+                if similarity[best] >= _SIMILARITY_THRESHOLD and self._similar_keys[best][1:] == cache_key[1:]:
+                    cached = self._response_cache.get(self._similar_keys[best])
+                    if cached and time.monotonic() - cached[0] < _RESPONSE_CACHE_TTL:
+                        self._similar_hits += 1
+                        return cached[1]
+            if len(self._query_vectors) >= _RESPONSE_CACHE_SIZE:
+                self._query_vectors.clear()
+            self._query_vectors[cache_key] = vector
+            return None
+    
+    def _index_similar(self, key: tuple):
+        """Make a newly cached response findable by similar questions"""
+        with self._cache_lock:
+            vector = self._query_vectors.pop(key, None)
+        if vector is None and (vector := self._embed_query(key[0])) is None:
+            return
+        with self._cache_lock:
+            if key not in self._response_cache:  # invalidated while embedding
+                return
+            # Drop rows whose responses were evicted before adding the new one
+            if len(self._similar_keys) >= _RESPONSE_CACHE_SIZE:
+                keep = [i for i, k in enumerate(self._similar_keys) if k in self._response_cache]
+                self._similar_keys = [self._similar_keys[i] for i in keep]
+                self._similar_vectors = self._similar_vectors[keep]
+            if self._similar_keys:
+                self._similar_vectors = np.vstack([self._similar_vectors, vector])
+            else:
+                self._similar_vectors = vector[np.newaxis, :]
+            self._similar_keys.append(key)
+    
+    def _run_tool_calls(self, user_input: str) -> Optional[str]:
+        """Resolve todo actions with one tool-calling LLM request, running every call it returns;
+        None when the model makes no call, so the agent handles the turn"""
+        # The latest exchange lets follow-ups like "yes, add it" name the right task
+        message = self._llm_tools.invoke([
+            ("system", "You manage the user's to-do list. Call the tools that fulfil the request. "
+                       "If it is not a clear to-do action, call no tool."),
+            *self._get_chat_history(user_input),
+            ("human", user_input)
+        ])
+        results = [
+            tool.func(*call["args"].values())
+            for call in getattr(message, "tool_calls", None) or []
+            if (tool := self._tools_by_name.get(call["name"]))
+        ]
+        return "\n".join(results) if results else None
+    
+    def _validate_input(self, user_input: str) -> Optional[str]:
+        """Return an error message when the input cannot be processed"""
+        if not user_input or not isinstance(user_input, str):
+            return "Please enter a valid message."
+        if not user_input.strip():
+            return "Please enter a message."
+        return None
+    
+    def _answer_directly(self, user_input: str) -> Tuple[Optional[str], Optional[tuple]]:
+        """Answer without the agent when possible, returning (reply, response cache key)"""
+        # Handle plain commands without invoking the agent
+        if (output := self._try_fast_path(user_input)) is not None:
+            return output, None
+        
+        # Todo actions need one LLM call, not a full agent loop
+        if _MUTATING_RE.search(user_input):
+            return self._run_tool_calls(user_input), None
+        
+        # Reuse the answer to a repeated read-only question that stands on its own
+        if _FOLLOW_UP_RE.search(user_input):
+            return None, None
+        cache_key = self._response_cache_key(user_input)
+        if (output := self._get_cached_response(cache_key)) is None:
+            output = self._find_similar_response(user_input, cache_key)
+        return output, cache_key
+    
+    def _agent_inputs(self, user_input: str, stored: bool = True) -> Dict:
+        """Build the agent input for a user message, which is not in history yet unless stored"""
+        return {
+            "input": user_input,
+            "context": self._get_conversation_context(),
+            "chat_history": self._get_chat_history(user_input, stored)
+        }
+    
+    def _record_agent_reply(self, user_input: str, output: str, cache_key: Optional[tuple]):
+        """Store an agent reply in history and, when safe, in the response cache"""
+        # Only cache when the agent left the todo list untouched
+        cacheable = cache_key and cache_key == self._response_cache_key(user_input) and not output.startswith(_AGENT_STOPPED)
+        self.memory.add_to_conversation("assistant", output)
+        if cacheable:
+            self._store_response(cache_key, output)
+            # Indexing may need an embedding call; keep it off the reply path
+            threading.Thread(target=self._index_similar, args=(cache_key,), name="similar-index", daemon=True).start()
+    
+    def _record_error(self, exc_info=True) -> str:
+        logger.error("Error processing chat input", exc_info=exc_info)
+        error_msg = "Sorry, I encountered an error. Please try again."
+        self.memory.add_to_conversation("assistant", error_msg)
+        return error_msg
+    
+    async def _astream_agent(self, user_input: str) -> AsyncIterator[str]:
+        """Yield the agent's final answer token by token as the LLM generates it"""
+        streamed = False
+        async for event in self.agent_executor.astream_events(self._agent_inputs(user_input), config=_AGENT_CONFIG, version="v2"):
+            if event["event"] == "on_chat_model_stream":
+                chunk = event["data"]["chunk"]
+                # Turns that call tools carry no answer text
+                if chunk.content and isinstance(chunk.content, str) and not chunk.tool_call_chunks:
+                    streamed = True
+                    yield chunk.content
+            elif event["event"] == "on_chain_end" and not event["parent_ids"] and not streamed:
+                # Answers the LLM did not write, such as the iteration limit message
+                if output := (event["data"].get("output") or {}).get("output"):
+                    yield output
+    
     def chat(self, user_input: str) -> str:
         """Process user input through the agent"""
+        return "".join(self.stream_chat(user_input))
+    
+    def _thread_loop(self) -> asyncio.AbstractEventLoop:
+        """Event loop for driving async streams from the calling thread, reused across calls"""
+        loop = getattr(self._loops, "loop", None)
+        if loop is None or loop.is_closed():
+            loop = self._loops.loop = asyncio.new_event_loop()
+        return loop
+    
+    def stream_chat(self, user_input: str) -> Iterator[str]:
+        """Process user input, yielding the reply as soon as parts of it are ready"""
         try:
-            if not user_input or not isinstance(user_input, str):
-                return "Please enter a valid message."
+            if error := self._validate_input(user_input):
+                yield error
+                return
             
+            # Store user input in conversation history
             user_input = user_input.strip()
-            if not user_input:
-                return "Please enter a message."
+            self.memory.add_to_conversation("user", user_input)
             
-            # Store user input in conversation history
+            output, cache_key = self._answer_directly(user_input)
+            if output is not None:
+                self.memory.add_to_conversation("assistant", output)
+                yield output
+                return
+            
+            # Process with agent, passing tokens on as they are generated
+            parts = []
+            loop = self._thread_loop()
+            tokens = self._astream_agent(user_input)
+            try:
+                while True:
+                    try:
+                        part = loop.run_until_complete(anext(tokens))
+                    except StopAsyncIteration:
+                        break
+                    parts.append(part)
+                    yield part
+            finally:
+                loop.run_until_complete(tokens.aclose())
+            
+            if parts:
+                self._record_agent_reply(user_input, "".join(parts), cache_key)
+                return
+            
+            yield "I didn't quite understand that. Could you please rephrase?"
+            
+        except Exception:
+            yield self._record_error()
+    
+    async def achat(self, user_input: str) -> str:
+        """Async counterpart of chat, so several conversations can await the LLM concurrently"""
+        try:
+            if error := self._validate_input(user_input):
+                return error
+            
+            user_input = user_input.strip()
             self.memory.add_to_conversation("user", user_input)
+            return self._store_reply(user_input, *await self._aanswer(user_input))
             
-            # Process with agent
-            response = self.agent_executor.invoke({
-                "input": user_input,
-                "context": self._get_conversation_context(),
-                "tool_names": ", ".join(t.name for t in self.agent_executor.tools)
-            })
+        except Exception:
+            return self._record_error()
+    
+    async def _aanswer(self, user_input: str, stored: bool = True) -> Tuple[Optional[str], Optional[tuple], bool]:
+        """Answer a stripped input without storing anything, returning (reply, response cache key, from agent)"""
+        output, cache_key = await asyncio.to_thread(self._answer_directly, user_input)
+        if output is not None:
+            return output, None, False
+        
+        # The executor gathers tool calls concurrently when one step requests several
+        response = await self.agent_executor.ainvoke(self._agent_inputs(user_input, stored), config=_AGENT_CONFIG)
+        if response and response.get("output"):
+            return response["output"], cache_key, True
+        return None, None, False
+    
+    def _store_reply(self, user_input: str, output: Optional[str], cache_key: Optional[tuple], from_agent: bool) -> str:
+        """Store a reply from _aanswer in history, returning the text to show"""
+        if output is None:
+            return "I didn't quite understand that. Could you please rephrase?"
+        if from_agent:
+            self._record_agent_reply(user_input, output, cache_key)
+        else:
+            self.memory.add_to_conversation("assistant", output)
+        return output
+    
+    async def astream_chat(self, user_input: str) -> AsyncIterator[str]:
+        """Async counterpart of stream_chat, yielding reply tokens as they are generated"""
+        try:
+            if error := self._validate_input(user_input):
+                yield error
+                return
             
-            # Extract and store response
-            if response and "output" in response:
-                output = response["output"]
+            user_input = user_input.strip()
+            self.memory.add_to_conversation("user", user_input)
+            
+            output, cache_key = await asyncio.to_thread(self._answer_directly, user_input)
+            if output is not None:
                 self.memory.add_to_conversation("assistant", output)
-                return output
+                yield output
+                return
             
-            return "I didn't quite understand that. Could you please rephrase?"
+            parts = []
+            async for part in self._astream_agent(user_input):
+                parts.append(part)
+                yield part
             
-        except Exception as e:
-            error_msg = "Sorry, I encountered an error. Please try again."
-            self.memory.add_to_conversation("assistant", error_msg)
-            return error_msg
+            if parts:
+                self._record_agent_reply(user_input, "".join(parts), cache_key)
+                return
+            
+            yield "I didn't quite understand that. Could you please rephrase?"
+            
+        except Exception:
+            yield self._record_error()
+    
+    async def chat_batch(self, inputs: List[str], max_concurrency: int = 5,
+                         requests_per_second: Optional[float] = None) -> List[str]:
+        """Answer several inputs in order, running read-only questions concurrently between todo edits,
+        optionally starting at most requests_per_second LLM-bound inputs per second"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+        rate_limiter = InMemoryRateLimiter(requests_per_second=requests_per_second) if requests_per_second else None
+        async def limited(answer: Awaitable):
+            async with semaphore:
+                if rate_limiter:
+                    await rate_limiter.aacquire()
+                return await answer
+        
+        replies: List[str] = []
+        questions: List[str] = []
+        
+        async def answer_questions():
+            # Questions are stored only once all of them are answered, so each one sees the history
+            # as of the last barrier rather than its siblings, and the log keeps question/answer pairs
+            valid = [q.strip() for q in questions if not self._validate_input(q)]
+            answers = iter(await asyncio.gather(*(limited(self._aanswer(q, stored=False)) for q in valid), return_exceptions=True))
+            for question in questions:
+                if error := self._validate_input(question):
+                    replies.append(error)
+                    continue
+                question = question.strip()
+                self.memory.add_to_conversation("user", question)
+                answer = next(answers)
+                if isinstance(answer, Exception):
+                    replies.append(self._record_error(exc_info=answer))
+                else:
+                    replies.append(self._store_reply(question, *answer))
+            questions.clear()
+        
+        for user_input in inputs:
+            # Commands and anything that may edit the todo list act as barriers, so they apply in order
+            # and the questions around them see the list as it was at that point
+            text = user_input.strip() if isinstance(user_input, str) else ""
+            command = bool(self._match_fast_path(text))
+            if not command and not _MUTATING_RE.search(text):
+                questions.append(user_input)
+                continue
+            await answer_questions()
+            # Plain commands skip the LLM, so they skip the rate limit too
+            replies.append(await (self.achat(user_input) if command else limited(self.achat(user_input))))
+        await answer_questions()
+        return replies
     
     def get_stats(self) -> Dict:
         """Get chatbot statistics"""
         return {
             "memory_stats": self.memory.get_stats(),
-            "todo_stats": self.todo_tools.get_stats()
+            "todo_stats": self.todo_tools.get_stats(),
+            "response_cache": {
+                "size": len(self._response_cache),
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "similar_hits": self._similar_hits
+            }
         }
 
 def main():
     """Run the chatbot"""
+    logging.basicConfig(level=logging.WARNING)
     print("📝 Todo List Assistant")
     print("=" * 40)
     print("Welcome! I'm your personal todo assistant.")
@@ -257,7 +756,7 @@ def main():
     print("=" * 40)
     
     # Check for API key
-    if not os.getenv("GOOGLE_API_KEY"):
+    if not _GOOGLE_API_KEY:
         print("❌ ERROR: Please set GOOGLE_API_KEY in your .env file")
         print("Get your free API key from: https://ai.google.dev/")
         return
@@ -269,8 +768,10 @@ def main():
     
     # Initialize chatbot
     try:
-        chatbot = TodoChatbot(user_name.lower())
+        chatbot = TodoChatbot(user_name.lower(), _GOOGLE_API_KEY)
         chatbot.memory.set_user_name(user_name)
+        # Warm up the LLM connection while the user types their first message
+        chatbot.prewarm()
         
         print(f"\nHello {user_name}! How can I help you today?")
         print("You can:")
@@ -288,14 +789,14 @@ def main():
                 if not user_input:
                     continue
                     
-                if user_input.lower() in ['exit', 'quit', 'bye', 'goodbye']:
-                    response = chatbot.chat(user_input)
-                    print(f"Assistant: {response}")
-                    break
+                # Process input through agent, printing the reply as it streams in
+                print("Assistant: ", end="", flush=True)
+                for chunk in chatbot.stream_chat(user_input):
+                    print(chunk, end="", flush=True)
+                print()
                 
-                # Process input through agent
-                response = chatbot.chat(user_input)
-                print(f"Assistant: {response}")
+                if user_input.lower() in _EXIT_WORDS:
+                    break
                 
             except KeyboardInterrupt:
                 print(f"\n\nGoodbye {user_name}! Your tasks and conversation are saved.")
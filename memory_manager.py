@@ -1,11 +1,66 @@
 import json
 import os
+import shutil
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from typing import Callable, Deque, List, Dict, Any, Optional, Set, Tuple, Union
 import logging
 from pathlib import Path
 import uuid
+from collections import Counter, deque
+from itertools import islice
 import hashlib
+from functools import lru_cache, wraps
+import atexit
+import time
+import threading
+import tempfile
+
+# Use orjson for reading and writing the data files when it is available
+try:
+    import orjson
+    
+    def _dumps(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str)
+    
+    def _dumps_line(data: Any) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS, default=str)
+    
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data: Any) -> bytes:
+        return json.dumps(data, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+    
+    def _dumps_line(data: Any) -> bytes:
+        return (json.dumps(data, ensure_ascii=False, default=str) + "\n").encode('utf-8')
+    
+    _loads = json.loads
+
+# Buffered conversation/profile changes are written after this many seconds or pending writes
+FLUSH_INTERVAL = 2.0
+FLUSH_EVERY = 10
+COMPACT_FACTOR = 2
+# A timer writes buffered changes at most this many seconds after they are made,
+# so a burst's last message does not wait in memory for the next one
+FLUSH_DELAY = 1.0
+# Backup copies of a file are kept at most once per this many seconds, newest BACKUP_KEEP only
+BACKUP_INTERVAL = 60.0
+BACKUP_KEEP = 3
+
+# Backup directories already created by this process
+_ENSURED_DIRS: Set[Path] = set()
+
+@lru_cache(maxsize=4096)
+def _hash_user_id(user_id: str) -> str:
+    # Same digest as before so existing data files keep their names; not a security use
+    return hashlib.sha256(user_id.encode(), usedforsecurity=False).hexdigest()[:32]
+
+def _locked(method):
+    """Run a MemoryManager method while holding the instance lock"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class MemoryManager:
     """Enhanced memory manager for conversation history and user profiles"""
@@ -17,183 +72,556 @@ class MemoryManager:
         
         self._access_count = 0          
         self._last_error = None        
+        # Guards file writes and cached state shared with the profile timer and other threads
+        self._lock = threading.RLock()
         self._setup_logging()
         
-        self.conversation_file = self.data_dir / f"{self.user_id}_conversation.json"
+        # In-memory copies of the conversation and profile, written back by flush()
+        self._conversation: Optional[Deque[Dict[str, Any]]] = None
+        self._role_counts: Counter = Counter()  # messages per role in the cached conversation
+        self._lowered: Deque[str] = deque(maxlen=max_conversation_length)  # lowercased message text, for search
+        self._profile: Optional[Dict[str, Any]] = None
+        self._unsaved_messages: List[Dict[str, Any]] = []  # appended to the log on flush
+        self._unarchived: List[Dict[str, Any]] = []  # evicted from the window, appended to the archive on flush
+        self._conv_lines = 0  # lines in the conversation log, compacted past COMPACT_FACTOR x the window
+        self._profile_dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        self._last_active_ts: Optional[float] = None  # formatted into the profile when read or saved
+        self._pending_writes = 0
+        self._last_flush = time.monotonic()
+        self._last_backup: Dict[Path, float] = {}  # monotonic time of the last backup per file
+        self._unsynced: Set[Path] = set()  # files replaced since the last flush, fsynced by it
+        self._todos: Optional[Tuple[List[dict], List[dict]]] = None  # parsed (active, completed) todos
+        self._todos_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the file _todos came from
+        self._todo_listeners: List[Callable[[], None]] = []
+        
+        self.conversation_file = self.data_dir / f"{self.user_id}_conversation.jsonl"
         self.profile_file = self.data_dir / f"{self.user_id}_profile.json"
+        self.archive_file = self.data_dir / f"{self.user_id}_archive.jsonl"
+        self.todos_file = self.data_dir / f"{self.user_id}_todos.json"
         self.backup_dir = self.data_dir / "backups"
         
         self._initialize_directories()
         self._initialize_files()
+        atexit.register(self.flush)
 
     
     def _sanitize_user_id(self, user_id: str) -> str:
-        return hashlib.sha256(user_id.encode()).hexdigest()[:32]
+        return _hash_user_id(user_id)
     
     def _setup_logging(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(f"MemoryManager_{self.user_id[:8]}")
+        # Handlers and format are configured by the host app
+        self.logger = logging.getLogger(f"{__name__}.{self.user_id[:8]}")
     
     def _initialize_directories(self):
+        # Relative data dirs point somewhere else once the working directory changes
+        backup_dir = self.backup_dir.absolute()
+        if backup_dir in _ENSURED_DIRS:
+            return
         try:
-            self.data_dir.mkdir(exist_ok=True, parents=True)
+            # Creating backups/ creates data_dir along the way
             self.backup_dir.mkdir(exist_ok=True, parents=True)
+            _ENSURED_DIRS.add(backup_dir)
         except Exception as e:
-            self.logger.error(f"Directory creation failed: {e}")
+            self.logger.error("Directory creation failed: %s", e)
             self.data_dir = Path(".")
             self.backup_dir = self.data_dir / "backups"
             self.backup_dir.mkdir(exist_ok=True)
-            self.conversation_file = self.data_dir / f"{self.user_id}_conversation.json"
+            self.conversation_file = self.data_dir / f"{self.user_id}_conversation.jsonl"
             self.profile_file = self.data_dir / f"{self.user_id}_profile.json"
+            self.archive_file = self.data_dir / f"{self.user_id}_archive.jsonl"
+            self.todos_file = self.data_dir / f"{self.user_id}_todos.json"
     
     def _initialize_files(self):
-        default_files = {
-            self.conversation_file: [],
-            self.profile_file: {
-                "user_id": self.user_id,
-                "user_name": "",
-                "preferences": {},
-                "created_at": datetime.now().isoformat(),
-                "last_active": datetime.now().isoformat(),
-                "metadata": {"version": "1.1"}
-            }
-        }
+        # Exclusive create: one open call, and existing files are never touched
+        try:
+            with open(self.conversation_file, 'xb') as f:
+                f.write(b"".join(_dumps_line(msg) for msg in self._take_legacy_conversation()))
+        except FileExistsError:
+            pass
+        except Exception as e:
+            self.logger.error("Failed to initialize %s: %s", self.conversation_file.name, e)
         
-        for file_path, default_data in default_files.items():
-            if not file_path.exists():
-                try:
-                    self._save_json(file_path, default_data)
-                except Exception as e:
-                    self.logger.error(f"Failed to initialize {file_path.name}: {e}")
+        self._create_json(self.profile_file, self._default_profile())
+        self._create_json(self.todos_file, self._default_todos())
     
-    def _load_json(self, file_path: Path) -> Union[dict, list]:
+    def _default_profile(self) -> Dict[str, Any]:
+        now = datetime.now().isoformat()
+        return {
+            "user_id": self.user_id,
+            "user_name": "",
+            "preferences": {},
+            "created_at": now,
+            "last_active": now,
+            "metadata": {"version": "1.1"}
+        }
+    
+    def _default_todos(self) -> Dict[str, Any]:
+        return {
+            "todos": [],
+            "completed": [],
+            "last_updated": datetime.now().isoformat()
+        }
+    
+    def _create_json(self, file_path: Path, data: Any) -> bool:
+        """Write data to file_path only if the file does not exist yet"""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                self._access_count += 1
-                return data
+            with open(file_path, 'xb') as f:
+                f.write(_dumps(data))
+            self._access_count += 1
+            return True
+        except FileExistsError:
+            return False
+        except Exception as e:
+            self.logger.error("Failed to initialize %s: %s", file_path.name, e)
+            return False
+    
+    def _load_json(self, file_path: Path, default: Optional[Dict[str, Any]] = None) -> Union[dict, list]:
+        """Parse file_path, recreating only that file from default if it is missing or corrupted"""
+        try:
+            data = _loads(file_path.read_bytes())
+            self._access_count += 1
+            return data
         except FileNotFoundError:
-            self._initialize_files()
-            return self._load_json(file_path)
+            pass
         except json.JSONDecodeError as e:
-            self.logger.error(f"JSON decode error in {file_path}: {e}")
-            corrupted_backup = file_path.with_name(f"{file_path.stem}_corrupted_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            self.logger.error("JSON decode error in %s: %s", file_path, e)
+            # One rolling copy per file, so repeated corruption cannot fill the disk
+            corrupted_backup = file_path.with_name(f"{file_path.stem}_corrupted.json")
             try:
                 os.replace(file_path, corrupted_backup)
             except Exception:
                 pass
-            self._initialize_files()
-            return self._load_json(file_path)
         except Exception as e:
-            self.logger.error(f"Unexpected error loading {file_path}: {e}")
-            return [] if "conversation" in file_path.name else {}
+            self.logger.error("Unexpected error loading %s: %s", file_path, e)
+            return {}
+        if default is None:
+            return {}
+        self._create_json(file_path, default)
+        return default
     
-    def _save_json(self, file_path: Path, data: Any, backup: bool = True):
+    def _write_temp(self, file_path: Path, payload: bytes) -> Path:
+        """Write payload to a uniquely named temp file next to file_path"""
+        with tempfile.NamedTemporaryFile(dir=file_path.parent, prefix=f"{file_path.name}.", suffix=".tmp", delete=False) as f:
+            f.write(payload)
+        return Path(f.name)
+    
+    def _save_json(self, file_path: Path, data: Any, backup: bool = False):
+        with self._lock:
+            try:
+                self._replace_json(file_path, data, backup)
+            except Exception as e:
+                self.logger.error("Error saving %s: %s", file_path, e)
+                raise
+    
+    def _replace_json(self, file_path: Path, data: Any, backup: bool):
+        temp_path = self._write_temp(file_path, _dumps(data))
         try:
-            if backup and file_path.exists():
+            # Keep the old version under backups/ while file_path itself is never missing
+            now = time.monotonic()
+            if backup and now - self._last_backup.get(file_path, float("-inf")) >= BACKUP_INTERVAL:
+                self._last_backup[file_path] = now
                 backup_path = self.backup_dir / f"{file_path.stem}_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
                 try:
-                    file_path.replace(backup_path)
-                except Exception:
+                    os.link(file_path, backup_path)
+                except FileNotFoundError:
                     pass
+                except OSError:
+                    try:
+                        shutil.copy2(file_path, backup_path)
+                    except Exception:
+                        pass
+                self._rotate_backups(file_path.stem)
             
-            temp_path = file_path.with_suffix('.tmp')
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False, default=str)
-            temp_path.replace(file_path)
-            self._access_count += 1
-        except Exception as e:
-            self.logger.error(f"Error saving {file_path}: {e}")
+            os.replace(temp_path, file_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
             raise
+        self._unsynced.add(file_path)
+        self._schedule_flush()
+        self._access_count += 1
+    
+    def _rotate_backups(self, stem: str):
+        # Timestamped names sort oldest first
+        for old in sorted(self.backup_dir.glob(f"{stem}_backup_*.json"))[:-BACKUP_KEEP]:
+            try:
+                old.unlink()
+            except OSError:
+                pass
+    
+    def _write_lines(self, file_path: Path, messages: List[Dict[str, Any]]):
+        with self._lock:
+            temp_path = self._write_temp(file_path, b"".join(_dumps_line(msg) for msg in messages))
+            try:
+                os.replace(temp_path, file_path)
+            except BaseException:
+                temp_path.unlink(missing_ok=True)
+                raise
+            self._unsynced.add(file_path)
+            self._schedule_flush()
+            self._access_count += 1
+    
+    def _take_legacy_conversation(self) -> List[Dict[str, Any]]:
+        """Read a conversation saved as a JSON list and move the old file to backups"""
+        legacy_file = self.conversation_file.with_suffix('.json')
+        try:
+            messages = _loads(legacy_file.read_bytes())
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError as e:
+            self.logger.error("JSON decode error in %s: %s", legacy_file, e)
+            messages = []
+        legacy_file.replace(self.backup_dir / legacy_file.name)
+        return messages[-self.max_conversation_length:] if isinstance(messages, list) else []
+    
+    @_locked
+    def _conversation_cache(self) -> Deque[Dict[str, Any]]:
+        if self._conversation is None:
+            conversation = deque(maxlen=self.max_conversation_length)
+            lines = 0
+            try:
+                with open(self.conversation_file, 'rb') as f:
+                    for line in f:
+                        lines += 1
+                        try:
+                            msg = _loads(line)
+                        except json.JSONDecodeError as e:
+                            self.logger.error("Skipping corrupted line in %s: %s", self.conversation_file, e)
+                            continue
+                        conversation.append(msg)
+                self._access_count += 1
+            except FileNotFoundError:
+                self._initialize_files()
+            self._conversation = conversation
+            self._role_counts = Counter(msg.get("role") for msg in conversation)
+            self._lowered = deque((msg.get("message", "").lower() for msg in conversation), maxlen=self.max_conversation_length)
+            self._conv_lines = lines
+        return self._conversation
+    
+    def _save_conversation(self):
+        """Append unsaved messages to the log, rewriting it once it holds too many old lines"""
+        if self._conv_lines + len(self._unsaved_messages) > COMPACT_FACTOR * self.max_conversation_length:
+            self._write_lines(self.conversation_file, self._conversation)
+            self._conv_lines = len(self._conversation)
+        else:
+            with open(self.conversation_file, 'ab') as f:
+                f.write(b"".join(_dumps_line(msg) for msg in self._unsaved_messages))
+                f.flush()
+                os.fsync(f.fileno())
+            self._access_count += 1
+            self._conv_lines += len(self._unsaved_messages)
+        self._unsaved_messages = []
+    
+    @_locked
+    def _profile_cache(self) -> Dict[str, Any]:
+        if self._profile is None:
+            profile = self._load_json(self.profile_file, self._default_profile())
+            self._profile = profile if isinstance(profile, dict) else {}
+        return self._profile
+    
+    def _maybe_flush(self):
+        self._pending_writes += 1
+        if self._pending_writes >= FLUSH_EVERY or time.monotonic() - self._last_flush >= FLUSH_INTERVAL:
+            self.flush()
+        else:
+            self._schedule_flush()
+    
+    def _schedule_flush(self):
+        """Start the flush timer unless one is already pending"""
+        with self._lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_DELAY, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def flush(self):
+        """Write buffered conversation and profile changes to disk"""
+        with self._lock:
+            try:
+                # Archive evicted messages before compaction can drop them from the log
+                if self._unarchived:
+                    self._archive(self._unarchived)
+                    self._unarchived = []
+                if self._unsaved_messages:
+                    self._save_conversation()
+            except Exception as e:
+                self.logger.error("Error flushing memory: %s", e)
+            self._pending_writes = 0
+            self._last_flush = time.monotonic()
+            self._flush_profile()
+            self._sync_to_disk()
+            # Saves above may have started the timer; this flush covers them. On the timer thread cancelling is a no-op
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+    
+    def _sync_to_disk(self):
+        """Make the saves done since the last flush durable: fsync each replaced file, then the directory once"""
+        # Saves skip fsync so they stay cheap under the lock; each one starts the flush timer,
+        # so a crash can lose at most FLUSH_DELAY worth of saves
+        for file_path in self._unsynced:
+            try:
+                with open(file_path, 'r+b') as f:
+                    os.fsync(f.fileno())
+            except FileNotFoundError:
+                pass  # removed since it was saved; nothing left to sync
+            except OSError as e:
+                self.logger.error("Error syncing %s: %s", file_path, e)
+        self._unsynced.clear()
+        try:
+            fd = os.open(self.data_dir, os.O_RDONLY)
+        except OSError:
+            return  # Directories cannot be opened this way on Windows
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+    
+    def _flush_profile(self):
+        with self._lock:
+            if not self._profile_dirty:
+                return
+            self._profile_dirty = False
+            try:
+                self._apply_last_active()
+                self._save_json(self.profile_file, dict(self._profile))
+            except Exception as e:
+                self.logger.error("Error saving profile: %s", e)
     
     # Conversation methods
+    @_locked
     def add_to_conversation(self, role: str, message: str, metadata: Optional[dict] = None):
         try:
-            conversation = self.get_conversation_history()
-            conversation.append({
-                "id": str(uuid.uuid4()),
+            conversation = self._conversation_cache()
+            entry = {
+                "id": uuid.uuid4().hex,
                 "role": role,
                 "message": message,
                 "timestamp": datetime.now().isoformat(),
                 "metadata": metadata or {}
-            })
-            if len(conversation) > self.max_conversation_length:
-                conversation = conversation[-self.max_conversation_length:]
-            self._save_json(self.conversation_file, conversation)
+            }
+            # The deque drops its oldest message on append; archive that message on the next flush
+            if len(conversation) == conversation.maxlen:
+                self._unarchived.append(conversation[0])
+                self._role_counts[conversation[0].get("role")] -= 1
+            conversation.append(entry)
+            self._lowered.append(message.lower())
+            self._role_counts[role] += 1
+            self._unsaved_messages.append(entry)
             self._update_last_active()
+            self._maybe_flush()
         except Exception as e:
-            self.logger.error(f"Error adding to conversation: {e}")
+            self.logger.error("Error adding to conversation: %s", e)
     
+    def _archive(self, messages: List[Dict[str, Any]]):
+        try:
+            with open(self.archive_file, 'ab') as f:
+                f.write(b"".join(_dumps_line(msg) for msg in messages))
+        except Exception as e:
+            self.logger.error("Error archiving conversation: %s", e)
+    
+    @_locked
     def get_conversation_history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
         try:
-            conversation = self._load_json(self.conversation_file)
-            if not isinstance(conversation, list):
-                conversation = []
-                self._save_json(self.conversation_file, conversation)
-            return conversation[-limit:] if limit else conversation
+            conversation = self._conversation_cache()
+            if limit and limit < len(conversation):
+                return list(islice(conversation, len(conversation) - limit, None))
+            return list(conversation)
         except Exception as e:
-            self.logger.error(f"Error getting conversation history: {e}")
+            self.logger.error("Error getting conversation history: %s", e)
             return []
     
+    def get_recent_conversation(self, limit: int = 3, max_chars: int = 200) -> List[Tuple[str, str]]:
+        """Return the last messages as (role, message) pairs, each message cut to max_chars"""
+        return [
+            (msg.get("role", "unknown"), msg.get("message", "")[:max_chars])
+            for msg in self.get_conversation_history(limit=limit)
+        ]
+    
+    @_locked
     def search_conversation(self, keyword: str, limit: int = 5) -> List[Dict[str, Any]]:
         try:
-            conversation = self.get_conversation_history()
-            results = [msg for msg in conversation if keyword.lower() in msg.get('message', '').lower()]
+            conversation = self._conversation_cache()
+            keyword = keyword.lower()
+            results = [msg for msg, text in zip(conversation, self._lowered) if keyword in text]
             return results[-limit:] if limit else results
         except Exception as e:
-            self.logger.error(f"Error searching conversation: {e}")
+            self.logger.error("Error searching conversation: %s", e)
             return []
     
+    @_locked
     def clear_conversation(self):
         try:
-            self._save_json(self.conversation_file, [])
+            self._conversation = deque(maxlen=self.max_conversation_length)
+            self._role_counts = Counter()
+            self._lowered = deque(maxlen=self.max_conversation_length)
+            self._unsaved_messages = []
+            self._conv_lines = 0
+            self._write_lines(self.conversation_file, [])
         except Exception as e:
-            self.logger.error(f"Error clearing conversation: {e}")
+            self.logger.error("Error clearing conversation: %s", e)
     
     # Profile methods
     def set_user_profile(self, **kwargs):
         try:
-            profile = self.get_user_profile()
-            profile.update(kwargs)
-            profile["last_updated"] = datetime.now().isoformat()
-            self._save_json(self.profile_file, profile)
+            with self._lock:
+                self._apply_last_active()
+                profile = self._profile_cache()
+                profile.update(kwargs)
+                profile["last_updated"] = datetime.now().isoformat()
+                self._save_json(self.profile_file, profile, backup=True)
+                self._profile_dirty = False
         except Exception as e:
-            self.logger.error(f"Error updating profile: {e}")
+            self.logger.error("Error updating profile: %s", e)
     
     def set_user_name(self, name: str):
         self.set_user_profile(user_name=name)
     
+    @_locked
     def get_user_profile(self) -> Dict[str, Any]:
         try:
-            profile = self._load_json(self.profile_file)
-            return profile if isinstance(profile, dict) else {}
+            self._apply_last_active()
+            return dict(self._profile_cache())
         except Exception as e:
-            self.logger.error(f"Error getting profile: {e}")
+            self.logger.error("Error getting profile: %s", e)
             return {}
     
+    @_locked
     def get_user_name(self) -> str:
-        return self.get_user_profile().get("user_name", "")
+        try:
+            return self._profile_cache().get("user_name", "")
+        except Exception as e:
+            self.logger.error("Error getting user name: %s", e)
+            return ""
     
     def _update_last_active(self):
-        self.set_user_profile(last_active=datetime.now().isoformat())
+        # Only the raw time is kept here; the flush timer coalesces the disk writes
+        with self._lock:
+            self._last_active_ts = time.time()
+            self._profile_dirty = True
+        self._schedule_flush()
+    
+    @_locked
+    def _apply_last_active(self):
+        if self._last_active_ts is not None:
+            self._profile_cache()["last_active"] = datetime.fromtimestamp(self._last_active_ts).isoformat()
+            self._last_active_ts = None
+    
+    # Todo methods
+    def add_todo_listener(self, callback: Callable[[], None]):
+        """Register a callback run whenever the todo list is saved"""
+        self._todo_listeners.append(callback)
+    
+    def _todos_file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = self.todos_file.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    @_locked
+    def _todo_cache(self) -> Tuple[List[dict], List[dict]]:
+        """Return the cached (active, completed) todos; callers must not modify them"""
+        # The CLI and the app may both write this file; reload after another process saves it
+        if self._todos is not None and self._todos_file_stamp() != self._todos_stamp:
+            self._todos = None
+            for callback in self._todo_listeners:
+                callback()
+        if self._todos is None:
+            self._load_todos()
+        return self._todos
+    
+    def _load_todos(self):
+        # Stamp before reading, so a save landing mid-read is caught by the next check
+        stamp = self._todos_file_stamp()
+        data = self._load_json(self.todos_file, self._default_todos())
+        legacy = isinstance(data, list)
+        if legacy:  # Backward compatibility
+            data = {"todos": data}
+        
+        active = data.get("todos", [])
+        completed = data.get("completed", [])
+        
+        # Ensure proper format
+        if active and isinstance(active[0], str):
+            active = [{"task": t} for t in active]
+            legacy = True
+        if completed and isinstance(completed[0], str):
+            completed = [{"task": t} for t in completed]
+            legacy = True
+        
+        self._todos = (active, completed)
+        if legacy:
+            # Save the upgraded format so later loads skip the conversion
+            try:
+                self._save_json(self.todos_file, {
+                    "todos": active,
+                    "completed": completed,
+                    "last_updated": datetime.now().isoformat()
+                })
+                stamp = self._todos_file_stamp()
+            except Exception as e:
+                self.logger.error("Error upgrading %s: %s", self.todos_file, e)
+        self._todos_stamp = stamp
+    
+    def _store_todos(self, active: List[dict], completed: List[dict], backup: bool = False):
+        with self._lock:
+            self._todos = None
+            for callback in self._todo_listeners:
+                callback()
+            self._save_json(self.todos_file, {
+                "todos": active,
+                "completed": completed,
+                "last_updated": datetime.now().isoformat()
+            }, backup=backup)
+            self._todos = (active, completed)
+            self._todos_stamp = self._todos_file_stamp()
+        self._update_last_active()
+    
+    @_locked
+    def get_todos(self, include_completed: bool = False) -> List[str]:
+        try:
+            active, completed = self._todo_cache()
+            todos = [t["task"] for t in active]
+            if include_completed:
+                todos.extend(t["task"] for t in completed)
+            return todos
+        except Exception as e:
+            self.logger.error("Error getting todos: %s", e)
+            return []
+    
+    @_locked
+    def save_todos(self, tasks: List[str]) -> bool:
+        """Replace the active todos with tasks, keeping completed ones"""
+        try:
+            _, completed = self._todo_cache()
+            self._store_todos([{"task": t} for t in tasks], list(completed), backup=True)
+            return True
+        except Exception as e:
+            self.logger.error("Error saving todos: %s", e)
+            return False
+    
+    def clear_todos(self) -> bool:
+        return self.save_todos([])
     
     # Utility methods
+    @_locked
     def get_stats(self) -> Dict[str, Any]:
         try:
-            conversation = self.get_conversation_history()
+            self._apply_last_active()
+            conversation = self._conversation_cache()
             return {
                 "total_messages": len(conversation),
-                "user_messages": sum(1 for msg in conversation if msg.get("role") == "user"),
-                "assistant_messages": sum(1 for msg in conversation if msg.get("role") == "assistant"),
-                "created_at": self.get_user_profile().get("created_at"),
-                "last_active": self.get_user_profile().get("last_active"),
+                "user_messages": self._role_counts["user"],
+                "assistant_messages": self._role_counts["assistant"],
+                "created_at": self._profile_cache().get("created_at"),
+                "last_active": self._profile_cache().get("last_active"),
                 "data_access_count": self._access_count
             }
         except Exception as e:
-            self.logger.error(f"Error getting stats: {e}")
+            self.logger.error("Error getting stats: %s", e)
             return {"error": str(e)}
     
     def get_last_error(self) -> Optional[str]:
@@ -39,8 +39,8 @@ def setup_env_file():
 
 def check_python_version():
     """Check if Python version is compatible"""
-    if sys.version_info < (3, 8):
-        print("❌ Python 3.8 or higher is required!")
+    if sys.version_info < (3, 10):
+        print("❌ Python 3.10 or higher is required!")
         return False
     print(f"✅ Python {sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro} detected")
     return True
@@ -252,7 +252,7 @@ def main():
         print("   - .env")
         print("2. Install dependencies: pip install -r requirements.txt")
         print("3. Check that all files are in the same directory")
-        print("4. Verify your Python version is 3.8+")
+        print("4. Verify your Python version is 3.10+")
         print("5. Set up your Google API key in .env file")
         
         # Show current directory contents
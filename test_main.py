@@ -0,0 +1,205 @@
+"""
+Tests for the chatbot's fast paths, response cache and batching
+"""
+
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import main
+from main import _ADD_RE, _LIST_RE, TodoChatbot
+
+
+@pytest.mark.parametrize("text", [
+    "list",
+    "list tasks",
+    "show my todos",
+    "show me all of my tasks",
+    "display the to-do list",
+    "what's on my list?",
+    "whats my todo list",
+])
+def test_list_pattern_matches_list_commands(text):
+    assert _LIST_RE.match(text)
+
+
+@pytest.mark.parametrize("text", [
+    "what's the best way to organize my tasks?",
+    "show me how this works",
+    "list some ideas for my tasks",
+])
+def test_list_pattern_ignores_questions_about_tasks(text):
+    assert not _LIST_RE.match(text)
+
+
+@pytest.mark.parametrize("text, task", [
+    ("add buy milk", "buy milk"),
+    ("add task: buy milk to my list", "buy milk"),
+    ("create report.", "report"),
+    ("new task call mom", "call mom"),
+    ("new todo: water plants", "water plants"),
+    ("add a dentist appointment to my list", "a dentist appointment"),
+])
+def test_add_pattern_extracts_task(text, task):
+    match = _ADD_RE.match(text)
+    assert match and match.group(1) == task
+
+
+@pytest.mark.parametrize("text", [
+    "new here, how does this work?",
+    "new york trip ideas",
+    "create a summary of my tasks",
+    "add more detail to your last answer",
+    "add it",
+])
+def test_add_pattern_ignores_requests_to_the_assistant(text):
+    assert not _ADD_RE.match(text)
+
+
+@pytest.fixture
+def chatbot(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    bot = TodoChatbot("tests", google_api_key="test-key")
+    bot.embeddings = None  # keep the similar-question lookup offline
+    return bot
+
+
+@pytest.fixture
+def offline_chatbot(chatbot):
+    """A chatbot whose LLM paths fail, so any reply must come from a fast path"""
+    chatbot.agent_executor = None
+    chatbot._llm_tools = None
+    return chatbot
+
+
+def test_plain_commands_skip_the_llm(offline_chatbot):
+    assert offline_chatbot.chat("add buy milk") == "✅ Added: buy milk"
+    assert offline_chatbot.chat("show my todos") == "📝 Your current to-do list:\n1. buy milk (Priority: medium)"
+    assert offline_chatbot.chat("done with buy milk") == "✅ Completed: buy milk"
+    assert offline_chatbot.chat("list") == "📝 Your todo list is empty"
+
+
+def test_greeting_skips_the_llm(offline_chatbot):
+    greetings = [t.replace("{name}", "friend") for t in offline_chatbot.responses["greetings"]]
+    assert offline_chatbot.chat("Hello!") in greetings
+
+
+def ask(bot, question, answer="answer"):
+    """Run a question through the direct paths, recording the agent's answer on a miss like chat() does"""
+    bot.memory.add_to_conversation("user", question)
+    output, cache_key = bot._answer_directly(question)
+    if output is None:
+        bot._record_agent_reply(question, answer, cache_key)
+        return None
+    bot.memory.add_to_conversation("assistant", output)
+    return output
+
+
+def test_repeated_question_is_answered_from_cache(chatbot):
+    assert ask(chatbot, "how should I prioritize my week") is None
+    assert ask(chatbot, "tell me a joke", "joke") is None
+    assert ask(chatbot, "How should I prioritize my week") == "answer"
+    assert chatbot.get_stats()["response_cache"]["hits"] == 1
+
+
+def test_follow_up_questions_are_not_cached(chatbot):
+    ask(chatbot, "why is that", "because")
+    assert ask(chatbot, "why is that", "another reason") is None
+    assert chatbot.get_stats()["response_cache"]["size"] == 0
+
+
+def test_agent_stop_message_is_not_cached(chatbot):
+    ask(chatbot, "how should I prioritize my week", "Agent stopped due to max iterations.")
+    assert chatbot.get_stats()["response_cache"]["size"] == 0
+
+
+def test_cached_response_expires(chatbot, monkeypatch):
+    ask(chatbot, "how should I prioritize my week")
+    monkeypatch.setattr(main, "_RESPONSE_CACHE_TTL", 0)
+    assert ask(chatbot, "how should I prioritize my week") is None
+
+
+def test_todo_change_invalidates_cache(chatbot):
+    ask(chatbot, "how should I prioritize my week")
+    chatbot.todo_tools.add_todo("buy milk")
+    assert chatbot.get_stats()["response_cache"]["size"] == 0
+    assert ask(chatbot, "how should I prioritize my week", "new answer") is None
+
+
+def test_cache_evicts_least_recently_used(chatbot, monkeypatch):
+    monkeypatch.setattr(main, "_RESPONSE_CACHE_SIZE", 2)
+    chatbot._store_response(("a",), "A")
+    chatbot._store_response(("b",), "B")
+    chatbot._get_cached_response(("a",))
+    chatbot._store_response(("c",), "C")
+    assert chatbot._get_cached_response(("b",)) is None
+    assert chatbot._get_cached_response(("a",)) == "A"
+    assert chatbot._get_cached_response(("c",)) == "C"
+
+
+class FakeEmbeddings:
+    """Embeds known questions as fixed vectors and records every call"""
+    vectors = {
+        "what is on my plate": [1, 0, 0.1],
+        "what is on my plate today": [1, 0, 0.12],
+        "tell me a joke": [0, 1, 0],
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    def embed_query(self, text):
+        self.calls.append(text)
+        return self.vectors[text]
+
+
+def wait_for_indexing():
+    for thread in threading.enumerate():
+        if thread.name == "similar-index":
+            thread.join()
+
+
+def test_similar_question_reuses_answer_after_other_turns(chatbot):
+    chatbot.embeddings = FakeEmbeddings()
+    ask(chatbot, "what is on my plate", "plate answer")
+    wait_for_indexing()
+    ask(chatbot, "tell me a joke", "joke")
+    wait_for_indexing()
+    assert ask(chatbot, "what is on my plate today") == "plate answer"
+    assert chatbot.get_stats()["response_cache"]["similar_hits"] == 1
+
+
+def test_first_question_is_embedded_after_the_reply(chatbot):
+    chatbot.embeddings = embeddings = FakeEmbeddings()
+    chatbot.memory.add_to_conversation("user", "what is on my plate")
+    chatbot._answer_directly("what is on my plate")
+    assert embeddings.calls == []  # nothing cached to compare against yet
+    chatbot._record_agent_reply("what is on my plate", "plate answer", chatbot._response_cache_key("what is on my plate"))
+    wait_for_indexing()
+    assert embeddings.calls == ["what is on my plate"]
+
+
+def test_batch_questions_see_history_without_their_siblings(chatbot):
+    histories = {}
+    class Executor:
+        async def ainvoke(self, inputs, **kwargs):
+            histories[inputs["input"]] = inputs["chat_history"]
+            await asyncio.sleep(0.01)
+            return {"output": f"re {inputs['input']}"}
+    chatbot.agent_executor = Executor()
+    chatbot.memory.add_to_conversation("user", "earlier question")
+    chatbot.memory.add_to_conversation("assistant", "earlier answer")
+
+    replies = asyncio.run(chatbot.chat_batch(["joke one", "joke two"]))
+
+    assert replies == ["re joke one", "re joke two"]
+    earlier = [("human", "earlier question"), ("ai", "earlier answer")]
+    assert histories == {"joke one": earlier, "joke two": earlier}
+    assert [m["message"] for m in chatbot.memory.get_conversation_history()][2:] == [
+        "joke one", "re joke one", "joke two", "re joke two"
+    ]
@@ -0,0 +1,111 @@
+"""
+Tests for MemoryManager storage
+"""
+
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import memory_manager
+from memory_manager import MemoryManager, _hash_user_id
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return tmp_path / "user_data"
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_buffered_message_is_written_by_the_timer(data_dir, monkeypatch):
+    monkeypatch.setattr(memory_manager, "FLUSH_DELAY", 0.05)
+    memory = MemoryManager("timer", data_dir=str(data_dir))
+    memory.add_to_conversation("user", "first")
+    memory.flush()
+
+    memory.add_to_conversation("user", "second")
+    assert len(read_lines(memory.conversation_file)) == 1  # still buffered
+
+    time.sleep(0.3)
+    assert [m["message"] for m in read_lines(memory.conversation_file)] == ["first", "second"]
+
+
+def test_legacy_conversation_is_migrated_to_jsonl(data_dir):
+    data_dir.mkdir()
+    legacy_file = data_dir / f"{_hash_user_id('alice')}_conversation.json"
+    legacy_file.write_text(json.dumps([
+        {"role": "user", "message": "hi", "timestamp": "2024-01-01T00:00:00"},
+        {"role": "assistant", "message": "hello", "timestamp": "2024-01-01T00:00:01"},
+    ]), encoding="utf-8")
+
+    memory = MemoryManager("alice", data_dir=str(data_dir))
+
+    assert [m["message"] for m in memory.get_conversation_history()] == ["hi", "hello"]
+    assert [m["message"] for m in read_lines(memory.conversation_file)] == ["hi", "hello"]
+    assert not legacy_file.exists()
+    assert (memory.backup_dir / legacy_file.name).exists()
+
+
+def test_corrupted_conversation_lines_are_skipped(data_dir):
+    memory = MemoryManager("carol", data_dir=str(data_dir))
+    memory.conversation_file.write_text(
+        json.dumps({"role": "user", "message": "kept"}) + "\n{not json\n", encoding="utf-8"
+    )
+
+    history = MemoryManager("carol", data_dir=str(data_dir)).get_conversation_history()
+
+    assert [m["message"] for m in history] == ["kept"]
+
+
+def test_log_is_compacted_once_it_outgrows_the_window(data_dir):
+    memory = MemoryManager("grace", data_dir=str(data_dir), max_conversation_length=3)
+    limit = memory_manager.COMPACT_FACTOR * memory.max_conversation_length
+    for i in range(limit):
+        memory.add_to_conversation("user", f"m{i}")
+        memory.flush()
+    assert len(read_lines(memory.conversation_file)) == limit
+
+    memory.add_to_conversation("user", "last")
+    memory.flush()
+
+    assert [m["message"] for m in read_lines(memory.conversation_file)] == [f"m{limit - 2}", f"m{limit - 1}", "last"]
+
+
+def test_window_keeps_latest_messages_and_archives_evicted_ones(data_dir):
+    memory = MemoryManager("erin", data_dir=str(data_dir), max_conversation_length=3)
+    for i in range(5):
+        memory.add_to_conversation("user", f"m{i}")
+
+    assert [m["message"] for m in memory.get_conversation_history()] == ["m2", "m3", "m4"]
+    assert memory.get_stats()["user_messages"] == 3
+    assert not memory.archive_file.exists()  # evictions wait for the flush
+
+    memory.flush()
+
+    assert [m["message"] for m in read_lines(memory.archive_file)] == ["m0", "m1"]
+    reloaded = MemoryManager("erin", data_dir=str(data_dir), max_conversation_length=3)
+    assert [m["message"] for m in reloaded.get_conversation_history()] == ["m2", "m3", "m4"]
+
+
+def test_search_only_sees_the_window(data_dir):
+    memory = MemoryManager("frank", data_dir=str(data_dir), max_conversation_length=2)
+    for message in ["Buy milk", "walk the dog", "buy bread"]:
+        memory.add_to_conversation("user", message)
+
+    assert [m["message"] for m in memory.search_conversation("BUY")] == ["buy bread"]
+
+
+def test_legacy_todo_list_is_upgraded_on_load(data_dir):
+    memory = MemoryManager("dave", data_dir=str(data_dir))
+    memory.todos_file.write_text(json.dumps(["buy milk", "call mom"]), encoding="utf-8")
+
+    assert MemoryManager("dave", data_dir=str(data_dir)).get_todos() == ["buy milk", "call mom"]
+    saved = json.loads(memory.todos_file.read_text(encoding="utf-8"))
+    assert saved["todos"] == [{"task": "buy milk"}, {"task": "call mom"}]
@@ -0,0 +1,58 @@
+"""
+Tests for TodoTools task lookup
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from memory_manager import MemoryManager
+from tools import TodoTools
+
+
+@pytest.fixture
+def tools(tmp_path):
+    todo_tools = TodoTools(MemoryManager("tools", data_dir=str(tmp_path)))
+    for task in ["Buy milk", "Buy bread", "Call mom"]:
+        todo_tools.add_todo(task)
+    return todo_tools
+
+
+def resolve(tools, task_ref):
+    active, _ = tools._get_current_todos()
+    return tools._resolve_task_ref(active, task_ref)
+
+
+@pytest.mark.parametrize("task_ref, index", [
+    (1, 0),
+    ("3", 2),
+    ("call mom", 2),
+    ("BUY MILK", 0),
+    ("mom", 2),
+])
+def test_resolve_task_ref_finds_task(tools, task_ref, index):
+    assert resolve(tools, task_ref) == (index, None)
+
+
+def test_resolve_task_ref_prefers_exact_match(tools):
+    tools.add_todo("Buy milk and eggs")
+    assert resolve(tools, "buy milk") == (0, None)
+
+
+@pytest.mark.parametrize("task_ref, error", [
+    (0, "⚠️ Invalid task number (1-3)"),
+    ("4", "⚠️ Invalid task number (1-3)"),
+    ("walk dog", "⚠️ Task 'walk dog' not found"),
+    ("buy", "⚠️ Multiple matches found - please specify by number"),
+])
+def test_resolve_task_ref_reports_errors(tools, task_ref, error):
+    assert resolve(tools, task_ref) == (None, error)
+
+
+def test_lookup_follows_saves(tools):
+    tools.remove_todo("buy milk")
+    assert resolve(tools, "buy") == (0, None)
+    assert resolve(tools, "3") == (None, "⚠️ Invalid task number (1-2)")
@@ -1,7 +1,16 @@
-from typing import List, Optional, Tuple, Union, Dict, Any
+from typing import Callable, List, Optional, Tuple, Union, Dict, Any
 from memory_manager import MemoryManager
 import logging
 from datetime import datetime
+from functools import wraps
+
+def _serialized(method):
+    """Run under the MemoryManager lock so concurrent edits are not lost and cached renders never go stale"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.memory._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
 
 class TodoTools:
     """Tools for managing todo items with completion tracking"""
@@ -9,55 +18,52 @@ class TodoTools:
     def __init__(self, memory_manager: MemoryManager):
         self.memory = memory_manager
         self.logger = logging.getLogger(__name__)
-        self.todos_file = self.memory.data_dir / f"{self.memory.user_id}_todos.json"
-        self._initialize_todos_file()
+        self.todos_file = self.memory.todos_file
+        self._rendered: Dict[bool, str] = {}  # list_todos output keyed by show_completed
+        self._index: Optional[Dict[str, int]] = None  # lowercased task -> position in the active list
+        self._lowered: Optional[List[str]] = None  # lowercased active tasks, in list order
+        # Todos can also be saved through the MemoryManager, so reset the caches there
+        self.memory.add_todo_listener(self._reset_caches)
+    
+    def add_change_listener(self, callback: Callable[[], None]):
+        """Register a callback run whenever the todo list is saved"""
+        self.memory.add_todo_listener(callback)
     
-    def _initialize_todos_file(self):
-        if not self.todos_file.exists():
-            try:
-                initial_data = {
-                    "todos": [],
-                    "completed": [],
-                    "last_updated": datetime.now().isoformat()
-                }
-                self.memory._save_json(self.todos_file, initial_data, backup=False)
-            except Exception as e:
-                self.logger.error(f"Failed to initialize todos file: {e}")
+    def _reset_caches(self):
+        self._rendered.clear()
+        self._index = None
+        self._lowered = None
     
     def _get_current_todos(self) -> Tuple[List[dict], List[dict]]:
+        # Callers edit the returned lists, so hand out copies of the cached ones
         try:
-            data = self.memory._load_json(self.todos_file)
-            if isinstance(data, list):  # Backward compatibility
-                return [{"task": t} for t in data], []
-            
-            active = data.get("todos", [])
-            completed = data.get("completed", [])
-            
-            # Ensure proper format
-            if active and isinstance(active[0], str):
-                active = [{"task": t} for t in active]
-            if completed and isinstance(completed[0], str):
-                completed = [{"task": t} for t in completed]
-                
-            return active, completed
+            active, completed = self.memory._todo_cache()
+            return list(active), list(completed)
         except Exception as e:
             self.logger.error(f"Error getting todos: {e}")
             return [], []
     
-    def _save_todos(self, active: List[dict], completed: List[dict]) -> bool:
+    def _lowered_tasks(self, active: List[dict]) -> List[str]:
+        """Lowercased active task names, rebuilt only after a save"""
+        if self._lowered is None:
+            self._lowered = [t["task"].lower() for t in active]
+        return self._lowered
+    
+    def _task_index(self, active: List[dict]) -> Dict[str, int]:
+        """Map each lowercased active task to its position, rebuilt only after a save"""
+        if self._index is None:
+            self._index = {task: i for i, task in enumerate(self._lowered_tasks(active))}
+        return self._index
+    
+    def _save_todos(self, active: List[dict], completed: List[dict], backup: bool = False) -> bool:
         try:
-            todo_data = {
-                "todos": active,
-                "completed": completed,
-                "last_updated": datetime.now().isoformat()
-            }
-            self.memory._save_json(self.todos_file, todo_data)
-            self.memory._update_last_active()
+            self.memory._store_todos(active, completed, backup=backup)
             return True
         except Exception as e:
             self.logger.error(f"Error saving todos: {e}")
             return False
     
+    @_serialized
     def add_todo(self, task: str, priority: str = "medium", tags: List[str] = None) -> str:
         try:
             if not task.strip():
@@ -66,7 +72,7 @@ class TodoTools:
             active, completed = self._get_current_todos()
             
             # Check for duplicate
-            if any(t["task"].lower() == task.lower() for t in active):
+            if task.lower() in self._task_index(active):
                 return f"⚠️ Task '{task}' already exists"
             
             new_task = {
@@ -84,66 +90,55 @@ class TodoTools:
             self.logger.error(f"Error adding todo: {e}")
             return f"❌ Error adding task: {str(e)}"
     
+    def _resolve_task_ref(self, active: List[dict], task_ref: Union[str, int]) -> Tuple[Optional[int], Optional[str]]:
+        """Resolve a task number or partial description to an index in active"""
+        # Handle index reference
+        if isinstance(task_ref, int) or task_ref.isdigit():
+            index = int(task_ref) - 1
+            if 0 <= index < len(active):
+                return index, None
+            return None, f"⚠️ Invalid task number (1-{len(active)})"
+        
+        # Handle text reference, preferring an exact match
+        task_lower = str(task_ref).lower()
+        if (index := self._task_index(active).get(task_lower)) is not None:
+            return index, None
+        matches = [i for i, task in enumerate(self._lowered_tasks(active)) if task_lower in task]
+        
+        if not matches:
+            return None, f"⚠️ Task '{task_ref}' not found"
+        if len(matches) > 1:
+            return None, "⚠️ Multiple matches found - please specify by number"
+        return matches[0], None
+    
+    @_serialized
     def remove_todo(self, task_ref: Union[str, int]) -> str:
         try:
             if not task_ref:
                 return "❌ Cannot remove empty task reference"
             
             active, completed = self._get_current_todos()
+            index, error = self._resolve_task_ref(active, task_ref)
+            if error:
+                return error
             
-            # Handle index reference
-            if isinstance(task_ref, int) or (isinstance(task_ref, str) and task_ref.isdigit()):
-                index = int(task_ref) - 1
-                if 0 <= index < len(active):
-                    removed = active.pop(index)
-                    if self._save_todos(active, completed):
-                        return f"✅ Removed: {removed['task']}"
-                    return "❌ Failed to save changes"
-                return f"⚠️ Invalid task number (1-{len(active)})"
-            
-            # Handle text reference
-            task_lower = str(task_ref).lower()
-            matches = [i for i, t in enumerate(active) if task_lower in t["task"].lower()]
-            
-            if not matches:
-                return f"⚠️ Task '{task_ref}' not found"
-            if len(matches) > 1:
-                return "⚠️ Multiple matches found - please specify by number"
-            
-            removed = active.pop(matches[0])
-            if self._save_todos(active, completed):
+            removed = active.pop(index)
+            if self._save_todos(active, completed, backup=True):
                 return f"✅ Removed: {removed['task']}"
             return "❌ Failed to save changes"
         except Exception as e:
             self.logger.error(f"Error removing todo: {e}")
             return f"❌ Error removing task: {str(e)}"
     
+    @_serialized
     def complete_todo(self, task_ref: Union[str, int]) -> str:
         try:
             active, completed = self._get_current_todos()
+            index, error = self._resolve_task_ref(active, task_ref)
+            if error:
+                return error
             
-            # Handle index reference
-            if isinstance(task_ref, int) or (isinstance(task_ref, str) and task_ref.isdigit()):
-                index = int(task_ref) - 1
-                if 0 <= index < len(active):
-                    task = active.pop(index)
-                    task["completed"] = datetime.now().isoformat()
-                    completed.append(task)
-                    if self._save_todos(active, completed):
-                        return f"✅ Completed: {task['task']}"
-                    return "❌ Failed to save changes"
-                return f"⚠️ Invalid task number (1-{len(active)})"
-            
-            # Handle text reference
-            task_lower = str(task_ref).lower()
-            matches = [i for i, t in enumerate(active) if task_lower in t["task"].lower()]
-            
-            if not matches:
-                return f"⚠️ Task '{task_ref}' not found"
-            if len(matches) > 1:
-                return "⚠️ Multiple matches found - please specify by number"
-            
-            task = active.pop(matches[0])
+            task = active.pop(index)
             task["completed"] = datetime.now().isoformat()
             completed.append(task)
             if self._save_todos(active, completed):
@@ -153,52 +148,60 @@ class TodoTools:
             self.logger.error(f"Error completing todo: {e}")
             return f"❌ Error completing task: {str(e)}"
     
+    @_serialized
     def list_todos(self, show_completed: bool = False) -> str:
+        # Reading the todos first resets _rendered if another process changed them
+        active, completed = self._get_current_todos()
+        if (rendered := self._rendered.get(show_completed)) is not None:
+            return rendered
         try:
-            active, completed = self._get_current_todos()
             
             if not active and (not show_completed or not completed):
-                return "📝 Your todo list is empty"
+                self._rendered[show_completed] = "📝 Your todo list is empty"
+                return self._rendered[show_completed]
             
             result = []
             if active:
                 result.append("📝 Your current to-do list:")
                 for i, task in enumerate(active, 1):
-                    task_str = f"{i}. {task['task']}"
-                    if "priority" in task:
-                        task_str += f" (Priority: {task['priority']})"
-                    if "tags" in task and task["tags"]:
-                        task_str += f" [Tags: {', '.join(task['tags'])}]"
-                    result.append(task_str)
+                    parts = [f"{i}. {task['task']}"]
+                    if (priority := task.get("priority")) is not None:
+                        parts.append(f" (Priority: {priority})")
+                    if tags := task.get("tags"):
+                        parts.append(f" [Tags: {', '.join(tags)}]")
+                    result.append("".join(parts))
             
             if show_completed and completed:
                 result.append("\n✅ Completed Tasks:")
-                for i, task in enumerate(completed, 1):
-                    task_str = f"{i}. {task['task']}"
-                    if "completed" in task:
-                        task_str += f" - Done on {task['completed'][:10]}"
-                    result.append(task_str)
-            
-            return "\n".join(result)
+                result.extend(
+                    f"{i}. {task['task']} - Done on {done[:10]}" if (done := task.get("completed")) is not None
+                    else f"{i}. {task['task']}"
+                    for i, task in enumerate(completed, 1)
+                )
+            
+            self._rendered[show_completed] = "\n".join(result)
+            return self._rendered[show_completed]
         except Exception as e:
             self.logger.error(f"Error listing todos: {e}")
             return f"❌ Error listing tasks: {str(e)}"
     
+    @_serialized
     def clear_todos(self, include_completed: bool = False) -> str:
         try:
             if include_completed:
-                if self._save_todos([], []):
+                if self._save_todos([], [], backup=True):
                     return "✅ Cleared all tasks (including completed)"
                 return "❌ Failed to clear tasks"
             
             _, completed = self._get_current_todos()
-            if self._save_todos([], completed):
+            if self._save_todos([], completed, backup=True):
                 return "✅ Cleared active tasks (kept completed)"
             return "❌ Failed to clear tasks"
         except Exception as e:
             self.logger.error(f"Error clearing todos: {e}")
             return f"❌ Error clearing tasks: {str(e)}"
     
+    @_serialized
     def get_stats(self) -> Dict[str, Any]:
         try:
             active, completed = self._get_current_todos()